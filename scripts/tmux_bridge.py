@@ -18,11 +18,19 @@ Dependencies: Python 3.10+ standard library only.
 
 from __future__ import annotations
 
+import functools
+import os
 import re
+import secrets
+import select
+import shlex
+import shutil
+import signal
 import subprocess
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import AnyStr, Iterator
 
 
 class TmuxError(Exception):
@@ -37,6 +45,12 @@ class CommandTimeoutError(TmuxError):
     """Raised when execute_and_wait exceeds its timeout."""
 
 
+@functools.cache
+def _tmux_bin() -> str:
+    """Return the tmux executable, resolved against PATH once."""
+    return shutil.which("tmux") or "tmux"
+
+
 # ---------------------------------------------------------------------------
 # ANSI escape sequence pattern
 # Covers: CSI sequences, OSC sequences, simple escapes
@@ -62,13 +76,239 @@ _ANSI_RE = re.compile(
     """,
     re.VERBOSE,
 )
+_ANSI_BYTES_RE = re.compile(_ANSI_RE.pattern.encode(), re.VERBOSE)
+
+# Lines of the marker protocol (marker echoes and their output) and a shell
+# prompt prefix (e.g. "$ ", "# ", "> "); see _clean_marker_output.
+_MARKER_LINE_RE = re.compile(r"^.*__TMUX_BRIDGE_.*(?:\n|$)", re.MULTILINE)
+_PROMPT_PREFIX_RE = re.compile(r"^[\$#>]\s*")
 
 
-def strip_ansi(text: str) -> str:
-    """Remove ANSI escape sequences from *text* and return plain text."""
+def strip_ansi(text: AnyStr) -> AnyStr:
+    """Remove ANSI escape sequences from *text* and return plain text.
+
+    ``bytes`` are accepted too, so raw terminal output can be stripped
+    before it is decoded.
+    """
+    # Every sequence starts with ESC; a plain buffer needs no regex pass.
+    if isinstance(text, bytes):
+        if b"\x1b" not in text:
+            return text
+        return _ANSI_BYTES_RE.sub(b"", text)
+    if "\x1b" not in text:
+        return text
     return _ANSI_RE.sub("", text)
 
 
+# First delay between buffer polls; doubled after every poll up to the
+# controller's poll_interval.
+_MIN_POLL_INTERVAL = 0.01
+
+
+def _poll_delays(interval: float) -> Iterator[float]:
+    """Yield sleep durations that back off exponentially up to *interval*.
+
+    Fast commands are picked up within a few milliseconds while long ones
+    settle at one poll per *interval*.
+    """
+    delay = min(_MIN_POLL_INTERVAL, interval)
+    while True:
+        yield delay
+        delay = min(delay * 2, interval)
+
+
+# History lines captured above the visible area while polling for the end
+# marker of execute_and_wait.
+_TAIL_LINES = 50
+# Longest single block on a wait-for channel before the pane is checked
+# directly, in case the pipe-pane job missed the end marker.
+_WAIT_FOR_SLICE = 1.0
+
+
+# ---------------------------------------------------------------------------
+# Control-mode client
+# ---------------------------------------------------------------------------
+
+# Characters that must be escaped inside a double-quoted tmux argument.
+_TMUX_QUOTE_RE = re.compile(r'[\\"$\x00-\x1f\x7f]')
+# Octal escapes used by %output notifications for control bytes and "\".
+_OCTAL_ESCAPE_RE = re.compile(rb"\\([0-7]{3})")
+
+
+def _quote_tmux_arg(arg: str) -> str:
+    """Quote *arg* for a tmux command line (control-mode stdin)."""
+    def _escape(m: re.Match[str]) -> str:
+        ch = m.group()
+        if ch in '\\"$':
+            return "\\" + ch
+        return f"\\{ord(ch):03o}"
+
+    return '"' + _TMUX_QUOTE_RE.sub(_escape, arg) + '"'
+
+
+class _ControlClient:
+    """A persistent ``tmux -C`` client that runs commands over a pipe.
+
+    Commands are written to the client's stdin as tmux command lines and
+    their replies are read back from the ``%begin`` / ``%end`` (or
+    ``%error``) blocks on stdout, so no process is spawned per command.
+
+    While a pane is being watched (see :meth:`watch`), its ``%output``
+    notifications are collected so callers can block in :meth:`wait_for`
+    instead of polling ``capture-pane``.
+    """
+
+    def __init__(self, session: str, timeout: float = 10.0) -> None:
+        self._timeout = timeout
+        self._pending = b""
+        self._watch_pane: bytes | None = None
+        self._watched = bytearray()
+        try:
+            self._proc = subprocess.Popen(
+                [_tmux_bin(), "-C", "attach-session", "-t", session],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise TmuxError(
+                "tmux is not installed or not in PATH"
+            ) from None
+        # The attach itself is answered with a reply block; consume it so
+        # that later replies line up with our commands.
+        self._read_reply("attach-session")
+        # Pane output is not needed for plain command/reply use.
+        self.command("refresh-client", "-f", "no-output")
+
+    def command(self, *args: str) -> str:
+        """Run a tmux subcommand and return its output.
+
+        Raises :class:`TmuxError` if tmux reports an error or the client
+        has gone away.
+        """
+        line = " ".join(_quote_tmux_arg(a) for a in args) + "\n"
+        try:
+            self._proc.stdin.write(line.encode())
+            self._proc.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise TmuxError("tmux control client is not running") from None
+        return self._read_reply(" ".join(args))
+
+    def watch(self, pane_id: str | None) -> None:
+        """Collect the output of *pane_id* from now on; ``None`` stops.
+
+        Pane output is only switched on while watching, so an idle client
+        is not woken by every byte the human's session prints.
+        """
+        if pane_id is None:
+            self._watch_pane = None
+            self.command("refresh-client", "-f", "no-output")
+            return
+        self._watch_pane = pane_id.encode()
+        self._watched = bytearray()
+        self.command("refresh-client", "-f", "!no-output")
+
+    def wait_for(self, needle: str, deadline: float) -> bool:
+        """Block until the watched pane has printed *needle*.
+
+        Returns ``False`` if *deadline* (``time.monotonic()``) passes first.
+        """
+        target = needle.encode()
+        searched = 0
+        while True:
+            if self._watched.find(target, searched) != -1:
+                return True
+            searched = max(0, len(self._watched) - len(target) + 1)
+            line = self._read_line(deadline)
+            if line is None:
+                return False
+            self._notification(line)
+
+    def close(self) -> None:
+        """Detach the control client and reap the process."""
+        if self._proc.poll() is None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=self._timeout)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self._proc.kill()
+                self._proc.wait()
+
+    def _read_line(self, deadline: float) -> bytes | None:
+        """Return the next line from stdout, without the newline.
+
+        Returns ``None`` if nothing arrives before *deadline*.
+        """
+        fd = self._proc.stdout.fileno()
+        while b"\n" not in self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise TmuxError("tmux control client exited")
+            self._pending += chunk
+        line, self._pending = self._pending.split(b"\n", 1)
+        return line
+
+    def _read_reply(self, what: str) -> str:
+        """Read one ``%begin`` ... ``%end`` block and return its body."""
+        deadline = time.monotonic() + self._timeout
+        # Notifications (%output, %session-changed, ...) may precede the
+        # reply.
+        while True:
+            line = self._read_line(deadline)
+            if line is None:
+                raise TmuxError(f"tmux command timed out: {what}")
+            if line.startswith(b"%begin "):
+                break
+            self._notification(line)
+        # The guard lines repeat the time and command number from %begin.
+        guard = line.split(b" ")[1:3]
+        body: list[bytes] = []
+        while True:
+            line = self._read_line(deadline)
+            if line is None:
+                raise TmuxError(f"tmux command timed out: {what}")
+            fields = line.split(b" ")
+            if fields[0] in (b"%end", b"%error") and fields[1:3] == guard:
+                break
+            body.append(line)
+        out = b"".join(b + b"\n" for b in body).decode("utf-8", "replace")
+        if fields[0] == b"%error":
+            raise TmuxError(
+                f"tmux command failed: {what}\nstderr: {out.strip()}"
+            )
+        return out
+
+    def _notification(self, line: bytes) -> None:
+        """Handle a line received outside a reply block."""
+        # %output %<pane_id> <escaped data>
+        if self._watch_pane is None or not line.startswith(b"%output "):
+            return
+        pane, _, data = line[len(b"%output "):].partition(b" ")
+        if pane == self._watch_pane:
+            self._watched += _OCTAL_ESCAPE_RE.sub(
+                lambda m: bytes([int(m.group(1), 8)]), data
+            )
+
+
+# ---------------------------------------------------------------------------
+# Session list cache
+# Shared by all controllers so that validating N controllers (and listing
+# sessions right after) costs one list-sessions call instead of N probes.
+# ---------------------------------------------------------------------------
+_SESSIONS_TTL = 2.0
+_sessions_cache: tuple[float, list[str]] | None = None
+
+
+def _invalidate_sessions_cache() -> None:
+    """Forget the cached session list (sessions may have been created or
+    killed)."""
+    global _sessions_cache
+    _sessions_cache = None
+
+
 # ---------------------------------------------------------------------------
 # TmuxController
 # ---------------------------------------------------------------------------
@@ -88,14 +328,30 @@ class TmuxController:
     default_timeout:
         Default timeout in seconds for :meth:`execute_and_wait`.
     poll_interval:
-        Seconds between buffer polls when waiting for command completion.
+        Maximum seconds between buffer polls when waiting for command
+        completion.  Polling starts at 10 ms and backs off to this value.
+    control_mode:
+        If ``True``, keep one ``tmux -C`` client attached to the session and
+        send every command through it instead of spawning ``tmux`` per
+        call.  Call :meth:`close` (or use the controller as a context
+        manager) to detach it.
+
+    Attributes
+    ----------
+    last_exit_status:
+        Exit status of the last command run by :meth:`execute_and_wait`
+        with markers, or ``None`` if it could not be determined.
     """
 
     session_name: str
     prompt_pattern: str = r"[\$#>] $"
     default_timeout: float = 30.0
     poll_interval: float = 0.3
+    control_mode: bool = False
+    last_exit_status: int | None = field(default=None, init=False)
     _target: str = field(init=False, repr=False)
+    _session: str = field(init=False, repr=False)
+    _client: _ControlClient | None = field(default=None, init=False, repr=False)
 
     def __post_init__(self) -> None:
         # If the caller passed a full target (session:window.pane), use it
@@ -105,13 +361,31 @@ class TmuxController:
         else:
             self._target = self.session_name
 
-        # Validate that the session exists.
-        if not self._session_exists():
+        self._session = re.split(r"[:.]", self._target, maxsplit=1)[0]
+
+        # Validate that the session exists.  A name found in the (cached)
+        # session list needs no has-session probe; anything else (ids,
+        # prefixes) is left to tmux to resolve.
+        if (
+            self._session not in self.list_sessions()
+            and not self._session_exists()
+        ):
             raise SessionNotFoundError(
                 f"tmux session '{self.session_name}' does not exist. "
                 f"Available sessions: {self.list_sessions()}"
             )
 
+        if self.control_mode:
+            # Attach to the session only: attaching to a window or pane
+            # target would also select it in the human's view.
+            self._client = _ControlClient(self._session)
+
+    def __enter__(self) -> TmuxController:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -129,7 +403,9 @@ class TmuxController:
         args = ["send-keys", "-t", self._target, text]
         if enter:
             args.append("Enter")
-        self._run_tmux(*args)
+        self._tmux(*args)
+        # Whatever was typed may have created or killed sessions.
+        _invalidate_sessions_cache()
 
     def read_buffer(
         self,
@@ -149,17 +425,45 @@ class TmuxController:
         Returns
         -------
         str
-            Plain text with ANSI escapes stripped.
+            Plain text without ANSI escapes.
         """
-        args = ["capture-pane", "-t", self._target, "-p"]
-        if history:
-            args.extend(["-S", "-"])
-        raw = self._run_tmux(*args)
-        cleaned = strip_ansi(raw)
+        cleaned = self._capture("-" if history else None)
         if lines is not None:
-            cleaned = "\n".join(cleaned.splitlines()[-lines:])
+            # Split off only the last *lines* lines rather than every line
+            # of the buffer; the final "\n" ends the last line.
+            if cleaned.endswith("\n"):
+                cleaned = cleaned[:-1]
+            cleaned = "\n".join(cleaned.rsplit("\n", lines)[-lines:])
         return cleaned
 
+    def read_all_panes(self, *, history: bool = False) -> dict[str, str]:
+        """Read the content of every pane in the session.
+
+        Panes are captured in parallel, so reading N panes costs about one
+        ``capture-pane`` round trip rather than N.  In control mode they
+        are read one by one over the (single) control client instead.
+
+        Parameters
+        ----------
+        history:
+            If ``True``, include the scroll-back history (``-S -``).
+
+        Returns
+        -------
+        dict[str, str]
+            Pane id (e.g. ``"%3"``) to plain-text content.
+        """
+        out = self._tmux(
+            "list-panes", "-s", "-t", self._session, "-F", "#{pane_id}"
+        )
+        pane_ids = [p for p in out.split("\n") if p]
+        start = "-" if history else None
+        if self._client is not None or len(pane_ids) < 2:
+            return {p: self._capture(start, pane=p) for p in pane_ids}
+        with ThreadPoolExecutor(max_workers=min(8, len(pane_ids))) as pool:
+            contents = pool.map(lambda p: self._capture(start, pane=p), pane_ids)
+            return dict(zip(pane_ids, contents))
+
     def execute_and_wait(
         self,
         command: str,
@@ -170,9 +474,9 @@ class TmuxController:
     ) -> str:
         """Send *command*, wait for completion, and return the output.
 
-        The method uses **echo markers** (unique UUIDs printed before and
-        after the command) to reliably detect when the command has finished
-        and to extract only the relevant output.
+        The method uses **echo markers** (unique random tokens printed before
+        and after the command) to reliably detect when the command has
+        finished and to extract only the relevant output.
 
         If *use_markers* is ``False``, it falls back to polling the buffer
         for the ``prompt_pattern``.
@@ -184,7 +488,7 @@ class TmuxController:
         timeout:
             Maximum seconds to wait.  Defaults to ``self.default_timeout``.
         poll_interval:
-            Override the default poll interval for this call.
+            Override the maximum poll interval for this call.
         use_markers:
             When ``True`` (default), wrap the command with echo markers for
             reliable output extraction.
@@ -192,8 +496,8 @@ class TmuxController:
         Returns
         -------
         str
-            The command's output (text between the markers), with ANSI
-            escapes removed.
+            The command's output (text between the markers), without ANSI
+            escapes.
 
         Raises
         ------
@@ -204,23 +508,79 @@ class TmuxController:
         interval = poll_interval if poll_interval is not None else self.poll_interval
 
         if use_markers:
-            return self._execute_with_markers(command, timeout, interval)
+            return self._execute_with_markers([command], timeout, interval)[0]
         return self._execute_with_prompt(command, timeout, interval)
 
+    def execute_many(
+        self,
+        commands: list[str],
+        *,
+        timeout: float | None = None,
+        poll_interval: float | None = None,
+    ) -> list[str]:
+        """Run *commands* one after another and return each one's output.
+
+        All commands are sent as a single line with a separator marker
+        after each of them, so the batch costs one send-keys and one wait
+        instead of one per command.  Commands run even if an earlier one
+        fails; :attr:`last_exit_status` reflects the last command.
+
+        Parameters
+        ----------
+        commands:
+            Shell commands to execute, in order.
+        timeout:
+            Maximum seconds to wait for the whole batch.  Defaults to
+            ``self.default_timeout``.
+        poll_interval:
+            Override the maximum poll interval for this call.
+
+        Returns
+        -------
+        list[str]
+            The output of each command, in the same order as *commands*.
+
+        Raises
+        ------
+        CommandTimeoutError
+            If the batch does not complete within *timeout* seconds.
+        """
+        if not commands:
+            return []
+        timeout = timeout if timeout is not None else self.default_timeout
+        interval = poll_interval if poll_interval is not None else self.poll_interval
+        return self._execute_with_markers(commands, timeout, interval)
+
+    def close(self) -> None:
+        """Detach the control-mode client, if any.  Safe to call twice."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
     # ------------------------------------------------------------------
     # Class / static helpers
     # ------------------------------------------------------------------
 
     @staticmethod
     def list_sessions() -> list[str]:
-        """Return a list of existing tmux session names."""
+        """Return a list of existing tmux session names.
+
+        The result is cached for ``_SESSIONS_TTL`` seconds.
+        """
+        global _sessions_cache
+        now = time.monotonic()
+        if _sessions_cache is not None and now - _sessions_cache[0] < _SESSIONS_TTL:
+            return list(_sessions_cache[1])
         try:
-            out = TmuxController._run_tmux(
+            out = TmuxController._spawn_tmux(
                 "list-sessions", "-F", "#{session_name}"
             )
-            return [s for s in out.splitlines() if s.strip()]
         except TmuxError:
             return []
+        # One name per line; the only empty entry is after the final "\n".
+        sessions = [s for s in out.split("\n") if s]
+        _sessions_cache = (now, sessions)
+        return list(sessions)
 
     @staticmethod
     def session_exists(name: str) -> bool:
@@ -239,53 +599,204 @@ class TmuxController:
         except TmuxError:
             return False
 
-    def _execute_with_markers(
-        self, command: str, timeout: float, interval: float
+    def _capture(
+        self, start: str | None = None, *, pane: str | None = None
     ) -> str:
-        """Marker-based synchronous execution."""
-        uid = uuid.uuid4().hex[:12]
-        start_marker = f"__TMUX_BRIDGE_START_{uid}__"
-        end_marker = f"__TMUX_BRIDGE_END_{uid}__"
+        """Capture the pane from line *start* (``-S``) down to the bottom.
 
-        # Send start marker and wait until it actually appears in the buffer
-        # before sending the command.
-        self.send_keys(f"echo '{start_marker}'", enter=True)
+        ``None`` captures the visible area only and ``"-"`` the whole
+        scroll-back history.  Without ``-e`` tmux renders the grid as plain
+        text, so the result needs no ANSI stripping.  *pane* overrides the
+        controller's target.
+        """
+        target = pane if pane is not None else self._target
+        args = ["capture-pane", "-t", target, "-p"]
+        if start is not None:
+            args.extend(["-S", start])
+        if self._client is None:
+            return self._spawn_tmux(*args)
+        return self._tmux(*args)
 
-        marker_deadline = time.monotonic() + timeout
-        while time.monotonic() < marker_deadline:
-            buf = self.read_buffer(history=True)
-            if start_marker in buf:
-                break
-            time.sleep(interval)
+    def _execute_with_markers(
+        self, commands: list[str], timeout: float, interval: float
+    ) -> list[str]:
+        """Marker-based synchronous execution of one or more commands."""
+        uid = secrets.token_hex(6)
+        start_marker = f"__TMUX_BRIDGE_START_{uid}__"
+        # One marker after each command; the last one is the end marker.
+        markers = [
+            f"__TMUX_BRIDGE_SEP_{uid}_{i}__" for i in range(len(commands) - 1)
+        ]
+        markers.append(f"__TMUX_BRIDGE_END_{uid}__")
+        end_marker = markers[-1]
+
+        # Send the start marker, the commands and their markers as a single
+        # line so the whole exchange costs one send-keys.  The uid is quoted
+        # separately ('..._START_'uid'__') so the line echoed back by the
+        # terminal never contains the literal markers -- only the shell's
+        # output does.  Each marker also carries the preceding command's
+        # exit status.
+        parts = [f"echo '__TMUX_BRIDGE_START_'{uid}'__'"]
+        for command, marker in zip(commands, markers):
+            prefix, suffix = marker.split(uid)
+            parts.append(command)
+            parts.append(f"echo '{prefix}'{uid}'{suffix}' $?")
+        line = " ; ".join(parts)
+        deadline = time.monotonic() + timeout
+        if self._client is not None:
+            done = self._await_marker_notified(line, end_marker, deadline)
         else:
-            raise CommandTimeoutError(
-                f"Start marker did not appear within {timeout}s"
+            channel = f"tmux_bridge_{uid}"
+            done = self._await_marker_polled(
+                line, end_marker, channel, deadline, interval
             )
+        if done:
+            return self._collect_marker_output(start_marker, markers, commands)
 
-        # Chain the command and the end-marker echo in a single send_keys
-        # call using ` ; ` so the shell executes the end-marker echo only
-        # after the command finishes.  Sending them separately would cause
-        # the end-marker echo to be queued in the terminal input buffer and
-        # appear interleaved with the command's output.
-        self.send_keys(
-            f"{command} ; echo '{end_marker}'", enter=True
+        what = commands[0] if len(commands) == 1 else commands
+        raise CommandTimeoutError(
+            f"Command did not complete within {timeout}s: {what!r}"
         )
 
-        deadline = time.monotonic() + timeout
-        while time.monotonic() < deadline:
-            buf = self.read_buffer(history=True)
-            # Look for both markers in the buffer
-            start_idx = buf.rfind(start_marker)
-            end_idx = buf.rfind(end_marker)
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                # Extract text between markers
-                output = buf[start_idx + len(start_marker): end_idx]
-                return self._clean_marker_output(output, command)
-            time.sleep(interval)
+    def _await_marker_notified(
+        self, line: str, end_marker: str, deadline: float
+    ) -> bool:
+        """Send *line* and wait for *end_marker* in control mode.
 
-        raise CommandTimeoutError(
-            f"Command did not complete within {timeout}s: {command!r}"
-        )
+        tmux pushes the pane's output to the control client, so this blocks
+        on its pipe until the marker shows up instead of polling.  Returns
+        ``False`` if *deadline* passes first.
+        """
+        pane_id = self._tmux(
+            "display-message", "-p", "-t", self._target, "#{pane_id}"
+        ).strip()
+        self._client.watch(pane_id)
+        try:
+            self.send_keys(line, enter=True)
+            return self._client.wait_for(end_marker, deadline)
+        finally:
+            self._client.watch(None)
+
+    def _await_marker_polled(
+        self,
+        line: str,
+        end_marker: str,
+        channel: str,
+        deadline: float,
+        interval: float,
+    ) -> bool:
+        """Send *line* and wait for *end_marker* to appear in the pane.
+
+        Polls while the back-off is short, so fast commands return quickly.
+        Once it reaches *interval*, a local pipe-pane job watches the pane
+        output and signals the wait-for *channel* on the marker, and this
+        blocks on the channel instead.  The pane's shell may run on a remote
+        host, which is why the signal does not come from the command line
+        itself.  Returns ``False`` if *deadline* passes first.
+        """
+        self.send_keys(line, enter=True)
+        piped: bool | None = None
+        delays = _poll_delays(interval)
+        try:
+            while time.monotonic() < deadline:
+                # Only the bottom of the pane is needed to spot the end
+                # marker.  This also covers output printed before the pipe
+                # was opened, or missed by it.
+                if end_marker in self._capture(f"-{_TAIL_LINES}"):
+                    return True
+                if piped:
+                    remaining = deadline - time.monotonic()
+                    if self._wait_for_channel(
+                        channel, min(remaining, _WAIT_FOR_SLICE)
+                    ):
+                        return True
+                    continue
+                delay = next(delays)
+                if delay >= interval and piped is None:
+                    piped = self._pipe_to_channel(end_marker, channel)
+                    continue
+                time.sleep(delay)
+            return False
+        finally:
+            # tmux may not have noticed the job exit yet; close the pipe so
+            # the next call finds the pane unpiped.
+            if piped:
+                self._close_pipe()
+
+    def _pipe_to_channel(self, needle: str, channel: str) -> bool:
+        """Pipe the pane's output to a job that signals *channel* (a tmux
+        ``wait-for`` channel) once *needle* has been printed.
+
+        Returns ``False`` if the pane already has a pipe, which is left
+        alone, or if tmux refuses.
+        """
+        try:
+            piped = self._spawn_tmux(
+                "display-message", "-p", "-t", self._target, "#{pane_pipe}"
+            )
+            if piped.strip() != "0":
+                return False
+            # The job does not inherit $TMUX; #{socket_path} is expanded by
+            # tmux to point it at this server.
+            self._run_tmux(
+                "pipe-pane", "-t", self._target,
+                f"grep -q -F {needle} && "
+                f"{shlex.quote(_tmux_bin())} -S '#{{socket_path}}' "
+                f"wait-for -S {channel}",
+            )
+        except TmuxError:
+            return False
+        return True
+
+    def _close_pipe(self) -> None:
+        """Close the pane's pipe-pane job, ignoring errors."""
+        try:
+            self._run_tmux("pipe-pane", "-t", self._target)
+        except TmuxError:
+            pass
+
+    @staticmethod
+    def _wait_for_channel(channel: str, timeout: float) -> bool:
+        """Block on ``tmux wait-for`` *channel* for up to *timeout* seconds.
+
+        A signal sent while nobody waits is remembered by tmux, so waiting
+        in slices does not lose it.
+        """
+        try:
+            result = subprocess.run(
+                [_tmux_bin(), "wait-for", channel],
+                capture_output=True,
+                timeout=max(timeout, 0),
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def _collect_marker_output(
+        self, start_marker: str, markers: list[str], commands: list[str]
+    ) -> list[str]:
+        """Capture the history and return the output between the markers."""
+        buf = self._capture("-")
+        # Walk back from the end marker so that marker lines of earlier runs
+        # still in the history are never matched.  Very long output may have
+        # pushed the first markers out of the history limit (-1); the output
+        # before the first marker found is then returned as is.
+        positions: list[int] = []
+        pos = len(buf)
+        for marker in reversed([start_marker, *markers]):
+            pos = buf.rfind(marker, 0, pos) if pos != -1 else -1
+            positions.insert(0, pos)
+
+        outputs: list[str] = []
+        for command, begin, end in zip(commands, positions, positions[1:]):
+            # The slice starts at the marker line, which the cleanup drops.
+            output = buf[max(begin, 0):end] if end != -1 else ""
+            outputs.append(self._clean_marker_output(output, command))
+
+        end = positions[-1]
+        status = buf[end + len(markers[-1]):].split("\n", 1)[0].strip()
+        self.last_exit_status = int(status) if status.isdigit() else None
+        return outputs
 
     def _execute_with_prompt(
         self, command: str, timeout: float, interval: float
@@ -297,10 +808,17 @@ class TmuxController:
         self.send_keys(command, enter=True)
         prompt_re = re.compile(self.prompt_pattern, re.MULTILINE)
 
+        delays = _poll_delays(interval)
         deadline = time.monotonic() + timeout
+        last_buf: str | None = None
         while time.monotonic() < deadline:
-            time.sleep(interval)
+            time.sleep(next(delays))
             buf = self.read_buffer(history=True)
+            # An unchanged buffer cannot have gained a prompt since the last
+            # poll; skip parsing it again.
+            if buf == last_buf:
+                continue
+            last_buf = buf
             # New content is everything after the old buffer
             new_content = buf[len(pre_buffer):]
             lines = new_content.splitlines()
@@ -309,8 +827,9 @@ class TmuxController:
                 # the typed command).
                 output_lines = lines[1:-1] if len(lines) > 1 else []
                 return "\n".join(output_lines)
-            # Also check visible pane (last line)
-            visible = self.read_buffer(lines=1)
+            # Also check visible pane (last line).  The history capture ends
+            # with the visible area, so no second capture is needed.
+            visible = buf.removesuffix("\n").rsplit("\n", 1)[-1]
             if prompt_re.search(visible):
                 new_content = buf[len(pre_buffer):]
                 output_lines = new_content.splitlines()
@@ -329,48 +848,31 @@ class TmuxController:
         """Clean up the output between markers.
 
         Removes:
-        - The echo command lines for the markers themselves
-        - The echoed command line
+        - Any line mentioning a marker (marker echoes and their output)
+        - The echoed command line, if it leads the output
         - Leading/trailing blank lines
         """
-        # Regex to strip common shell prompt prefixes (e.g. "$ ", "# ", "> ")
-        prompt_prefix_re = re.compile(r"^[\$#>]\s*")
-
-        lines = raw.splitlines()
-        cleaned: list[str] = []
-        cmd_stripped = command.strip()
-        for line in lines:
-            stripped = line.strip()
-            # Strip prompt prefix for comparison purposes
-            without_prompt = prompt_prefix_re.sub("", stripped)
-            # Skip the echo commands for markers (full or partial line)
-            if without_prompt.startswith("echo '__TMUX_BRIDGE_"):
-                continue
-            # Skip the echoed command (with or without prompt prefix)
-            if without_prompt == cmd_stripped:
-                continue
-            # Skip shell prompts that echo the marker/command
-            # (e.g. "$ echo '__TMUX_BRIDGE_START_xxx__'")
-            if "__TMUX_BRIDGE_" in stripped:
-                continue
-            cleaned.append(line)
-
-        # Strip leading/trailing empty lines
-        text = "\n".join(cleaned).strip()
-        # Remove a trailing partial echo line that may remain when the
-        # end-marker string is found inside its own echo command line in
-        # the buffer (e.g. a trailing "echo '" fragment).
-        text = re.sub(r"\necho\s+['\"]?\s*$", "", text)
-        # Also remove the prompt line at the end if present
+        text = _MARKER_LINE_RE.sub("", raw).strip("\n")
+        # The echoed command can only precede the output, so checking the
+        # first line (with or without a prompt prefix) is enough.
+        first, _, rest = text.partition("\n")
+        if _PROMPT_PREFIX_RE.sub("", first.strip()) == command.strip():
+            text = rest.lstrip("\n")
         return text
 
+    def _tmux(self, *args: str) -> str:
+        """Run a tmux subcommand through the control client if attached."""
+        if self._client is not None:
+            return self._client.command(*args)
+        return self._run_tmux(*args)
+
     @staticmethod
     def _run_tmux(*args: str) -> str:
         """Run a tmux subcommand and return stdout.
 
         Raises :class:`TmuxError` on non-zero exit.
         """
-        cmd = ["tmux", *args]
+        cmd = [_tmux_bin(), *args]
         try:
             result = subprocess.run(
                 cmd,
@@ -393,3 +895,55 @@ class TmuxController:
                 f"{' '.join(cmd)}\nstderr: {result.stderr.strip()}"
             )
         return result.stdout
+
+    @staticmethod
+    def _spawn_tmux(*args: str) -> str:
+        """Run a read-only tmux subcommand and return stdout.
+
+        A leaner variant of :meth:`_run_tmux` for captures and listings: the
+        client is started with ``posix_spawn`` and only stdout is piped back.
+        On a non-zero exit the command is re-run through :meth:`_run_tmux`
+        to report tmux's error message, so it must be safe to repeat.
+        """
+        cmd = [_tmux_bin(), *args]
+        r, w = os.pipe()
+        try:
+            pid = os.posix_spawnp(
+                cmd[0],
+                cmd,
+                os.environ,
+                file_actions=[
+                    (os.POSIX_SPAWN_DUP2, w, 1),
+                    (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+                ],
+            )
+        except FileNotFoundError:
+            os.close(r)
+            raise TmuxError(
+                "tmux is not installed or not in PATH"
+            ) from None
+        finally:
+            os.close(w)
+
+        chunks: list[bytes] = []
+        deadline = time.monotonic() + 10
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([r], [], [], remaining)[0]:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    raise TmuxError(
+                        f"tmux command timed out: {' '.join(cmd)}"
+                    )
+                chunk = os.read(r, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(r)
+
+        _, status = os.waitpid(pid, 0)
+        if os.waitstatus_to_exitcode(status) != 0:
+            return TmuxController._run_tmux(*args)
+        return b"".join(chunks).decode("utf-8", "replace")